@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import json
 import os
@@ -5,6 +6,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Annotated
 from dataclasses import dataclass, field
+from enum import IntEnum
 
 from dotenv import load_dotenv
 from pydantic import Field
@@ -29,9 +31,9 @@ logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
-# Create orders directory if it doesn't exist
+# Orders directory, created on the first order write instead of at import
 ORDERS_DIR = Path(__file__).parent.parent / "orders"
-ORDERS_DIR.mkdir(exist_ok=True)
+_orders_dir_ready = False
 
 # Menu prices (in rupees ₹)
 DRINK_PRICES = {
@@ -60,8 +62,111 @@ MILK_UPCHARGE = {
     "soy": 60,
 }
 
+# Spoken names for drinks and extras, e.g. "cold_brew" -> "cold brew"
+_DRINK_DISPLAY = {drink: drink.replace("_", " ") for drink in DRINK_PRICES}
+_EXTRA_DISPLAY = {extra: extra.replace("_", " ") for extra in EXTRA_PRICES}
 
-@dataclass
+# Drinks and sizes as dense row/column indices into _BASE_PRICES. Both enums
+# are generated from DRINK_PRICES so they cannot drift from the price table.
+Drink = IntEnum("Drink", [drink.upper() for drink in DRINK_PRICES], start=0)
+Size = IntEnum("Size", [size.upper() for size in next(iter(DRINK_PRICES.values()))], start=0)
+
+# Lookup from the normalized names used by add_item to the enum members
+_DRINK_IDS = {drink.name.lower(): drink for drink in Drink}
+_SIZE_IDS = {size.name.lower(): size for size in Size}
+
+for _drink, _sizes in DRINK_PRICES.items():
+    if _sizes.keys() != _SIZE_IDS.keys():
+        raise ValueError(f"{_drink} must be priced for exactly these sizes: {', '.join(_SIZE_IDS)}")
+
+# Dense base price table indexed as _BASE_PRICES[drink][size]
+_BASE_PRICES = [
+    [DRINK_PRICES[drink.name.lower()][size.name.lower()] for size in Size]
+    for drink in Drink
+]
+
+# Accepted milks and extras, as sets for constant-time membership checks
+_VALID_MILKS = frozenset(("whole", "skim", "none", *MILK_UPCHARGE))
+_VALID_EXTRAS = frozenset(EXTRA_PRICES)
+
+
+def _build_menu() -> str:
+    """Render the full menu text from the price tables."""
+    lines = ["Here's our menu at Starbucks:", ""]
+
+    lines.append("☕ SPECIALTY DRINKS (Small/Medium/Large):")
+    for drink, prices in DRINK_PRICES.items():
+        drink_name = _DRINK_DISPLAY[drink].title()
+        lines.append(f"  • {drink_name}: ₹{prices['small']:.0f} / ₹{prices['medium']:.0f} / ₹{prices['large']:.0f}")
+
+    lines.append("")
+    lines.append("🥛 MILK OPTIONS:")
+    lines.append("  • Whole, Skim, or None - included")
+    lines.append("  • Oat, Almond, or Soy - add ₹60")
+
+    lines.append("")
+    lines.append("✨ EXTRAS:")
+    for extra, price in EXTRA_PRICES.items():
+        extra_name = _EXTRA_DISPLAY[extra].title()
+        lines.append(f"  • {extra_name} - add ₹{price:.0f}")
+
+    # Keep the trailing newline after the last entry
+    lines.append("")
+    return "\n".join(lines)
+
+
+# The menu only depends on the constant price tables above, so render it once
+_MENU_TEXT = _build_menu()
+
+
+def _dump_order(order_data: dict) -> bytes:
+    """Serialize an order as a single JSON line."""
+    return json.dumps(order_data, separators=(",", ":"), ensure_ascii=False).encode() + b"\n"
+
+
+def _append_order(filename: Path, line: bytes) -> None:
+    """Append one order line. Blocking, so run it off the event loop."""
+    global _orders_dir_ready
+    if not _orders_dir_ready:
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        _orders_dir_ready = True
+    with open(filename, "ab") as f:
+        f.write(line)
+
+
+# System prompt for the barista, shared by every session
+_INSTRUCTIONS = """You are a friendly and enthusiastic barista at Starbucks, a premium coffee shop.
+Your job is to help customers place their coffee orders in a warm, conversational way.
+
+WORKFLOW:
+1. Greet the customer warmly
+2. Take their order (drink, size, milk, extras)
+3. Ask for their name
+4. Review the complete order with pricing
+5. Confirm and process the order
+
+MENU ITEMS:
+- Espresso, Latte, Cappuccino, Americano, Mocha, Cold Brew, Macchiato, Flat White
+- Sizes: Small (₹245-₹410), Medium (₹285-₹450), Large (₹330-₹495)
+- Milk: Whole, Skim, Oat (+₹60), Almond (+₹60), Soy (+₹60), or None
+- Extras: Extra shot (+₹65), Whipped cream (+₹60), Caramel drizzle (+₹50),
+  Vanilla syrup (+₹50), Hazelnut syrup (+₹50), Chocolate chips (+₹60)
+
+IMPORTANT GUIDELINES:
+- Be warm, friendly, and conversational like a real barista
+- Ask questions naturally, one at a time
+- Offer suggestions if the customer seems unsure
+- After adding each item, use review_order to show them their current order
+- Before finalizing, ALWAYS call review_order to confirm the complete order with prices
+- Keep responses concise and conversational
+- Don't use emojis or special formatting in your speech
+- Multiple items can be ordered - ask if they want anything else
+- You can modify or remove items if requested
+
+Start by greeting the customer warmly and asking what they'd like to order today."""
+
+
+@dataclass(slots=True)
 class OrderItem:
     """Represents a single item in the order."""
     order_id: str
@@ -70,14 +175,23 @@ class OrderItem:
     milk: str
     extras: list[str] = field(default_factory=list)
     price: float = 0.0
+    # Enum forms of drink_type/size for pricing, always derived from the strings
+    drink_id: Drink = field(init=False)
+    size_id: Size = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.drink_id = _DRINK_IDS[self.drink_type]
+        self.size_id = _SIZE_IDS[self.size]
 
     def calculate_price(self) -> float:
         """Calculate the total price for this item."""
-        base_price = DRINK_PRICES.get(self.drink_type, {}).get(self.size, 0.0)
-        milk_charge = MILK_UPCHARGE.get(self.milk, 0.0)
-        extras_charge = sum(EXTRA_PRICES.get(extra, 0.0) for extra in self.extras)
-        self.price = base_price + milk_charge + extras_charge
-        return self.price
+        price = _BASE_PRICES[self.drink_id][self.size_id]
+        price += MILK_UPCHARGE.get(self.milk, 0.0)
+        extra_price = EXTRA_PRICES.get
+        for extra in self.extras:
+            price += extra_price(extra, 0.0)
+        self.price = price
+        return price
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
@@ -86,7 +200,7 @@ class OrderItem:
             "drink_type": self.drink_type,
             "size": self.size,
             "milk": self.milk,
-            "extras": self.extras,
+            "extras": list(self.extras),
             "price": self.price,
         }
 
@@ -96,39 +210,13 @@ class CoffeeBaristaAgent(Agent):
     
     def __init__(self) -> None:
         super().__init__(
-            instructions="""You are a friendly and enthusiastic barista at Starbucks, a premium coffee shop. 
-            Your job is to help customers place their coffee orders in a warm, conversational way.
-            
-            WORKFLOW:
-            1. Greet the customer warmly
-            2. Take their order (drink, size, milk, extras)
-            3. Ask for their name
-            4. Review the complete order with pricing
-            5. Confirm and process the order
-            
-            MENU ITEMS:
-            - Espresso, Latte, Cappuccino, Americano, Mocha, Cold Brew, Macchiato, Flat White
-            - Sizes: Small (₹245-₹410), Medium (₹285-₹450), Large (₹330-₹495)
-            - Milk: Whole, Skim, Oat (+₹60), Almond (+₹60), Soy (+₹60), or None
-            - Extras: Extra shot (+₹65), Whipped cream (+₹60), Caramel drizzle (+₹50), 
-              Vanilla syrup (+₹50), Hazelnut syrup (+₹50), Chocolate chips (+₹60)
-            
-            IMPORTANT GUIDELINES:
-            - Be warm, friendly, and conversational like a real barista
-            - Ask questions naturally, one at a time
-            - Offer suggestions if the customer seems unsure
-            - After adding each item, use review_order to show them their current order
-            - Before finalizing, ALWAYS call review_order to confirm the complete order with prices
-            - Keep responses concise and conversational
-            - Don't use emojis or special formatting in your speech
-            - Multiple items can be ordered - ask if they want anything else
-            - You can modify or remove items if requested
-            
-            Start by greeting the customer warmly and asking what they'd like to order today.""",
+            instructions=_INSTRUCTIONS,
         )
         
-        # Initialize order items list
-        self.order_items: list[OrderItem] = []
+        # Order items keyed by order_id (dicts keep insertion order)
+        self.order_items: dict[str, OrderItem] = {}
+        # Running total, kept in step with order_items by add_item/remove_item
+        self.order_total = 0.0
         self.customer_name: str | None = None
         self.next_item_id = 1
     
@@ -165,23 +253,29 @@ class CoffeeBaristaAgent(Agent):
         - "I'll have a medium latte with oat milk" -> add_item("latte", "medium", "oat", [])
         - "Large mocha with whipped cream and extra shot" -> add_item("mocha", "large", "whole", ["whipped_cream", "extra_shot"])
         """
-        if extras is None:
-            extras = []
-        
         # Normalize inputs
         drink_type = drink_type.lower().replace(" ", "_")
         size = size.lower()
         milk = milk.lower()
-        extras = [e.lower().replace(" ", "_") for e in extras]
+        extras = [e.lower().replace(" ", "_") for e in extras] if extras else []
         
         # Validate drink type
-        if drink_type not in DRINK_PRICES:
+        if drink_type not in _DRINK_IDS:
             raise ToolError(f"Sorry, we don't have {drink_type}. Available drinks: " + ", ".join(DRINK_PRICES.keys()))
         
         # Validate size
-        if size not in ["small", "medium", "large"]:
+        if size not in _SIZE_IDS:
             raise ToolError(f"Size must be small, medium, or large, not {size}")
         
+        # Validate milk
+        if milk not in _VALID_MILKS:
+            raise ToolError(f"Sorry, we don't have {milk} milk. Milk options: whole, skim, oat, almond, soy, or none")
+        
+        # Validate extras
+        for extra in extras:
+            if extra not in _VALID_EXTRAS:
+                raise ToolError(f"Sorry, we don't have {extra}. Available extras: " + ", ".join(EXTRA_PRICES.keys()))
+        
         # Create order item
         order_id = f"item_{self.next_item_id}"
         self.next_item_id += 1
@@ -194,10 +288,11 @@ class CoffeeBaristaAgent(Agent):
             extras=extras,
         )
         item.calculate_price()
-        self.order_items.append(item)
+        self.order_items[order_id] = item
+        self.order_total += item.price
         
-        logger.info(f"Added item: {item.to_dict()}")
-        return f"Added {size} {drink_type.replace('_', ' ')} to your order! Price: ₹{item.price:.0f}. Order ID: {order_id}"
+        logger.info("Added item: %s", item)
+        return f"Added {size} {_DRINK_DISPLAY[drink_type]} to your order! Price: ₹{item.price:.0f}. Order ID: {order_id}"
     
     @function_tool
     async def remove_item(
@@ -212,13 +307,13 @@ class CoffeeBaristaAgent(Agent):
         
         Use review_order first to see the order_ids of all items.
         """
-        for i, item in enumerate(self.order_items):
-            if item.order_id == order_id:
-                removed_item = self.order_items.pop(i)
-                logger.info(f"Removed item: {removed_item.to_dict()}")
-                return f"Removed {removed_item.size} {removed_item.drink_type.replace('_', ' ')} from your order."
+        removed_item = self.order_items.pop(order_id, None)
+        if removed_item is None:
+            raise ToolError(f"Item {order_id} not found. Use review_order to see all items.")
+        self.order_total -= removed_item.price
         
-        raise ToolError(f"Item {order_id} not found. Use review_order to see all items.")
+        logger.info("Removed item: %s", removed_item)
+        return f"Removed {removed_item.size} {_DRINK_DISPLAY[removed_item.drink_type]} from your order."
     
     @function_tool
     async def review_order(self, context: RunContext) -> str:
@@ -229,25 +324,25 @@ class CoffeeBaristaAgent(Agent):
         if not self.order_items:
             return "Your order is currently empty."
         
-        order_summary = "Here's your current order:\n"
-        total = 0.0
+        lines = ["Here's your current order:"]
         
-        for item in self.order_items:
+        for item in self.order_items.values():
             extras_text = ""
             if item.extras:
-                extras_text = " with " + ", ".join(e.replace("_", " ") for e in item.extras)
+                extras_text = " with " + ", ".join(_EXTRA_DISPLAY[e] for e in item.extras)
             
             milk_text = "" if item.milk == "none" else f" with {item.milk} milk"
             
-            order_summary += f"- {item.order_id}: {item.size.capitalize()} {item.drink_type.replace('_', ' ')}{milk_text}{extras_text} - ₹{item.price:.0f}\n"
-            total += item.price
+            lines.append(f"- {item.order_id}: {item.size.capitalize()} {_DRINK_DISPLAY[item.drink_type]}{milk_text}{extras_text} - ₹{item.price:.0f}")
         
-        order_summary += f"\nTotal: ₹{total:.0f}"
+        lines.append("")
+        lines.append(f"Total: ₹{self.order_total:.0f}")
         
         if self.customer_name:
-            order_summary += f"\nName: {self.customer_name}"
+            lines.append(f"Name: {self.customer_name}")
         
-        logger.info(f"Order review: {order_summary}")
+        order_summary = "\n".join(lines)
+        logger.info("Order review: %s", order_summary)
         return order_summary
     
     @function_tool
@@ -257,24 +352,8 @@ class CoffeeBaristaAgent(Agent):
         Call this when the customer asks "What do you have?", "Show me the menu", 
         "What's available?", or seems unsure about what to order.
         """
-        menu = "Here's our menu at Starbucks:\n\n"
-        
-        menu += "☕ SPECIALTY DRINKS (Small/Medium/Large):\n"
-        for drink, prices in DRINK_PRICES.items():
-            drink_name = drink.replace("_", " ").title()
-            menu += f"  • {drink_name}: ₹{prices['small']:.0f} / ₹{prices['medium']:.0f} / ₹{prices['large']:.0f}\n"
-        
-        menu += "\n🥛 MILK OPTIONS:\n"
-        menu += "  • Whole, Skim, or None - included\n"
-        menu += "  • Oat, Almond, or Soy - add ₹60\n"
-        
-        menu += "\n✨ EXTRAS:\n"
-        for extra, price in EXTRA_PRICES.items():
-            extra_name = extra.replace("_", " ").title()
-            menu += f"  • {extra_name} - add ₹{price:.0f}\n"
-        
         logger.info("Menu displayed to customer")
-        return menu
+        return _MENU_TEXT
     
     @function_tool
     async def set_customer_name(self, context: RunContext, name: str) -> str:
@@ -284,12 +363,12 @@ class CoffeeBaristaAgent(Agent):
             name: The customer's name
         """
         self.customer_name = name
-        logger.info(f"Customer name set: {name}")
+        logger.info("Customer name set: %s", name)
         return f"Perfect! I have your name as {name}."
     
     @function_tool
     async def complete_order(self, context: RunContext) -> str:
-        """Complete and save the order to a JSON file.
+        """Complete and append the order to the day's JSONL order log.
         
         ONLY call this after:
         1. At least one item has been added
@@ -304,30 +383,29 @@ class CoffeeBaristaAgent(Agent):
         if not self.customer_name:
             raise ToolError("Cannot complete order - customer name is missing. Please ask for their name.")
         
-        # Calculate total
-        total = sum(item.price for item in self.order_items)
+        total = self.order_total
         
         # Generate order ID and timestamp
-        order_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        order_id = now.strftime("%Y%m%d_%H%M%S")
+        timestamp = now.isoformat()
         
         # Create order data
         order_data = {
             "orderId": order_id,
             "timestamp": timestamp,
             "customerName": self.customer_name,
-            "items": [item.to_dict() for item in self.order_items],
+            "items": [item.to_dict() for item in self.order_items.values()],
             "total": round(total, 2),
             "itemCount": len(self.order_items),
         }
         
-        # Save to JSON file
-        filename = ORDERS_DIR / f"order_{order_id}.json"
-        with open(filename, "w") as f:
-            json.dump(order_data, f, indent=2)
+        # Append to the day's order log, one JSON object per line
+        filename = ORDERS_DIR / f"orders_{now:%Y%m%d}.jsonl"
+        await asyncio.to_thread(_append_order, filename, _dump_order(order_data))
         
-        logger.info(f"Order saved: {filename}")
-        logger.info(f"Order details: {order_data}")
+        logger.info("Order saved: %s", filename)
+        logger.info("Order details: %s", order_data)
         
         # Store completed order details for response
         completed_order = {
@@ -338,7 +416,8 @@ class CoffeeBaristaAgent(Agent):
         }
         
         # Reset for next customer
-        self.order_items = []
+        self.order_items = {}
+        self.order_total = 0.0
         self.customer_name = None
         self.next_item_id = 1
         
@@ -346,7 +425,22 @@ class CoffeeBaristaAgent(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    # The silero plugin already runs the bundled ONNX model through onnxruntime
+    # with a single-threaded CPU session; pin it to CPU explicitly
+    proc.userdata["vad"] = silero.VAD.load(force_cpu=True)
+    # Build the pipeline plugins here too, so the job doesn't pay for them
+    # after it has been dispatched. Each job process runs a single job, and the
+    # plugins only open their HTTP sessions on first use inside that job.
+    proc.userdata["stt"] = deepgram.STT(model="nova-3")
+    proc.userdata["llm"] = google.LLM(
+        model="gemini-2.5-flash",
+    )
+    proc.userdata["tts"] = murf.TTS(
+        voice="en-US-matthew",
+        style="Conversation",
+        tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+        text_pacing=True,
+    )
 
 
 async def entrypoint(ctx: JobContext):
@@ -360,20 +454,13 @@ async def entrypoint(ctx: JobContext):
     session = AgentSession(
         # Speech-to-text (STT) is your agent's ears, turning the user's speech into text that the LLM can understand
         # See all available models at https://docs.livekit.io/agents/models/stt/
-        stt=deepgram.STT(model="nova-3"),
+        stt=ctx.proc.userdata["stt"],
         # A Large Language Model (LLM) is your agent's brain, processing user input and generating a response
         # See all available models at https://docs.livekit.io/agents/models/llm/
-        llm=google.LLM(
-                model="gemini-2.5-flash",
-            ),
+        llm=ctx.proc.userdata["llm"],
         # Text-to-speech (TTS) is your agent's voice, turning the LLM's text into speech that the user can hear
         # See all available models as well as voice selections at https://docs.livekit.io/agents/models/tts/
-        tts=murf.TTS(
-                voice="en-US-matthew", 
-                style="Conversation",
-                tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-                text_pacing=True
-            ),
+        tts=ctx.proc.userdata["tts"],
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
         # Using VAD-based turn detection for Windows compatibility
@@ -404,7 +491,7 @@ async def entrypoint(ctx: JobContext):
 
     async def log_usage():
         summary = usage_collector.get_summary()
-        logger.info(f"Usage: {summary}")
+        logger.info("Usage: %s", summary)
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from livekit.agents import ToolError
+
+import agent
+from agent import CoffeeBaristaAgent
+
+
+@pytest.fixture
+def barista() -> CoffeeBaristaAgent:
+    return CoffeeBaristaAgent()
+
+
+@pytest.mark.parametrize(
+    ("drink_type", "size", "milk", "extras"),
+    [
+        ("frappuccino", "medium", "whole", []),
+        ("latte", "venti", "whole", []),
+        ("latte", "medium", "goat", []),
+        ("latte", "medium", "whole", ["sprinkles"]),
+    ],
+    ids=["drink", "size", "milk", "extra"],
+)
+async def test_add_item_rejects_unknown_options(
+    barista: CoffeeBaristaAgent, drink_type, size, milk, extras
+) -> None:
+    """Unknown menu options are rejected and nothing is added to the order."""
+    with pytest.raises(ToolError):
+        await barista.add_item(None, drink_type, size, milk, extras)
+
+    assert barista.order_items == {}
+    assert barista.order_total == 0.0
+
+
+async def test_add_item_normalizes_names(barista: CoffeeBaristaAgent) -> None:
+    """Spoken names with spaces and capitals map onto the menu keys."""
+    result = await barista.add_item(None, "Flat White", "Large", "Oat", ["Extra Shot"])
+
+    item = barista.order_items["item_1"]
+    assert item.drink_type == "flat_white"
+    assert item.size == "large"
+    assert item.milk == "oat"
+    assert item.extras == ["extra_shot"]
+    assert item.price == 450 + 60 + 65
+    assert barista.order_total == item.price
+    assert "large flat white" in result
+
+
+async def test_remove_item_rejects_unknown_id(barista: CoffeeBaristaAgent) -> None:
+    """Removing an id that isn't in the order raises and leaves the order alone."""
+    await barista.add_item(None, "latte", "medium", "whole")
+
+    with pytest.raises(ToolError):
+        await barista.remove_item(None, "item_99")
+
+    assert list(barista.order_items) == ["item_1"]
+    assert barista.order_total == 410
+
+
+async def test_complete_order_appends_to_daily_jsonl(
+    barista: CoffeeBaristaAgent, tmp_path, monkeypatch
+) -> None:
+    """Each completed order is one line in the day's log, created on first write."""
+    orders_dir = tmp_path / "orders"
+    monkeypatch.setattr(agent, "ORDERS_DIR", orders_dir)
+    monkeypatch.setattr(agent, "_orders_dir_ready", False)
+    assert not orders_dir.exists()
+
+    for name in ("Ana", "Zoë"):
+        await barista.add_item(None, "mocha", "small", "none", ["whipped_cream"])
+        await barista.set_customer_name(None, name)
+        await barista.complete_order(None)
+
+        assert barista.order_items == {}
+        assert barista.order_total == 0.0
+        assert barista.customer_name is None
+
+    assert orders_dir.is_dir()
+    [log_file] = orders_dir.glob("orders_*.jsonl")
+    orders = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+
+    assert [order["customerName"] for order in orders] == ["Ana", "Zoë"]
+    assert all(order["total"] == 470 and order["itemCount"] == 1 for order in orders)
+    assert orders[1]["items"][0]["order_id"] == "item_1"